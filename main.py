@@ -1,35 +1,108 @@
 # --- IMPORTS ---
 from skyfield.api import load, Topos
 from skyfield.almanac import find_discrete, moon_phases, oppositions_conjunctions
-from datetime import datetime, timedelta
+from skyfield.framelib import ecliptic_frame
+from skyfield.timelib import Time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import argparse
-import pytz
+import numpy
+import os
+import shelve
 import sys
 try:
-    from Levenshtein import distance as levenshtein_distance
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:
+    # Python < 3.9 has no zoneinfo; fall back to pytz, which behaves the same
+    # way here since timezones are only ever used through astimezone().
+    import pytz
+    ZoneInfo = pytz.timezone
+    ZoneInfoNotFoundError = pytz.UnknownTimeZoneError
+try:
+    from rapidfuzz.distance.Levenshtein import distance as levenshtein_distance
     from rich.console import Console
     from rich.table import Table
     from rich.panel import Panel
     from rich.prompt import Prompt, Confirm
 except ImportError:
-    print("Required packages 'python-Levenshtein' and 'rich' are not installed.")
+    print("Required packages 'rapidfuzz' and 'rich' are not installed.")
     print("Please install them by running: pip install -r requirements.txt")
     sys.exit(1)
 
 # --- CONSTANTS ---
 console = Console()
-SUPPORTED_BODIES = [
-    'mars', 'venus', 'jupiter', 'saturn', 'mercury', 
+SUPPORTED_BODIES_ORDERED = (
+    'mars', 'venus', 'jupiter', 'saturn', 'mercury',
     'neptune', 'uranus', 'pluto', 'moon', 'sun'
-]
+)
+SUPPORTED_BODIES = frozenset(SUPPORTED_BODIES_ORDERED)
+SEARCH_CHUNK_DAYS = 3650
+REFINE_EPSILON = 0.001 / 86400.0
+EVENTS_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'astro-data')
+EVENTS_CACHE_PATH = os.path.join(EVENTS_CACHE_DIR, 'events')
+EVENTS_CACHE_FORMAT = 2
+
+# --- CACHED RESOURCES ---
+
+@lru_cache(maxsize=1)
+def get_eph_ts():
+    """Load the ephemeris and timescale once and reuse them for every query."""
+    eph = load('de421.bsp')
+    ts = load.timescale(builtin=True)
+    return eph, ts
+
+@lru_cache(maxsize=None)
+def get_moon_phase_function(eph):
+    """Return the almanac moon phase function, built once per ephemeris."""
+    return moon_phases(eph)
+
+@lru_cache(maxsize=None)
+def get_opposition_conjunction_function(eph, target_name):
+    """Return the almanac opposition/conjunction function, built once per target."""
+    return oppositions_conjunctions(eph, eph[target_name])
+
+def read_cached_events(ts, keys):
+    """Return the cached events for every target whose key is found in the on-disk cache."""
+    results = {}
+    try:
+        with shelve.open(EVENTS_CACHE_PATH, flag='r') as cache:
+            for target_name, key in keys.items():
+                try:
+                    entry = cache.get(key)
+                    if entry is not None:
+                        results[target_name] = {
+                            kind: EventSet.from_arrays(ts, *arrays) for kind, arrays in entry.items()
+                        }
+                except Exception:
+                    # A corrupt or incompatible entry is simply calculated again.
+                    pass
+    except Exception:
+        # Caching is best-effort; a missing or unreadable cache means calculating everything.
+        pass
+    return results
+
+def write_cached_events(keys, calculated):
+    """Store calculated events in the on-disk cache, ignoring any failure to do so."""
+    try:
+        os.makedirs(EVENTS_CACHE_DIR, exist_ok=True)
+        with shelve.open(EVENTS_CACHE_PATH) as cache:
+            for target_name, events in calculated.items():
+                cache[keys[target_name]] = {kind: event_set.to_arrays() for kind, event_set in events.items()}
+    except Exception:
+        pass
+
+def get_events_cache_key(eph, target_name, start_date, end_date):
+    """Build the events cache key; it changes whenever the ephemeris file does."""
+    mtime = os.path.getmtime(eph.path)
+    return f"v{EVENTS_CACHE_FORMAT}:{eph.filename}:{mtime}:{target_name}:{start_date.isoformat()}:{end_date.isoformat()}"
 
 # --- HELPER & CONVERSION FUNCTIONS ---
 
-def convert_to_timezone(utc_time_str, timezone_name):
-    """Convert UTC time string to the specified timezone."""
+def convert_to_timezone(utc_dt, tz):
+    """Convert an aware UTC datetime to the given, already resolved, timezone."""
     try:
-        utc_dt = datetime.fromisoformat(utc_time_str.replace('Z', '+00:00'))
-        tz = pytz.timezone(timezone_name)
+        utc_dt = (utc_dt + timedelta(microseconds=500000)).replace(microsecond=0)
         local_dt = utc_dt.astimezone(tz)
         return local_dt.strftime('%Y-%m-%d %H:%M:%S %Z')
     except Exception as e:
@@ -51,68 +124,224 @@ def get_opposition_conjunction_name(event_number, target_name):
 
 # --- CORE LOGIC ---
 
-def get_astronomical_events(eph, ts, target_name, start_date, end_date):
+@dataclass
+class EventSet:
+    """Events found by a search: one Skyfield Time array and the matching NumPy event codes."""
+    times: Time
+    codes: numpy.ndarray
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def empty(cls, ts):
+        """Returns an event set with no events."""
+        return cls(ts.tt_jd(numpy.empty(0)), numpy.empty(0, dtype='int8'))
+
+    @classmethod
+    def from_searches(cls, ts, searches):
+        """Joins the (times, codes) pairs returned by several find_discrete calls."""
+        whole = [numpy.empty(0)]
+        fraction = [numpy.empty(0)]
+        codes = [numpy.empty(0, dtype='int8')]
+        for search_times, search_codes in searches:
+            whole.append(search_times.whole)
+            fraction.append(search_times.tt_fraction)
+            codes.append(search_codes)
+        return cls.from_arrays(ts, numpy.concatenate(whole), numpy.concatenate(fraction), numpy.concatenate(codes))
+
+    @classmethod
+    def from_arrays(cls, ts, whole, fraction, codes):
+        """Rebuilds an event set from the plain arrays produced by to_arrays()."""
+        return cls(ts.tt_jd(whole, fraction), codes)
+
+    def to_arrays(self):
+        """Returns the split TT Julian dates and codes as plain arrays, cheap to pickle."""
+        return self.times.whole, self.times.tt_fraction, self.codes
+
+def get_ecliptic_longitudes(earth, body):
+    """Returns the apparent ecliptic longitudes of a body seen from an Earth position, in radians."""
+    _, lon, _ = earth.observe(body).apparent().frame_latlon(ecliptic_frame)
+    return lon.radians
+
+def get_sun_sides(sun_lon, target_lon):
+    """Returns 0 or 1 depending on which side of the Sun the target is, like the almanac."""
+    return ((sun_lon - target_lon) / numpy.pi % 2.0).astype('int8')
+
+def find_oppositions_conjunctions(eph, ts, target_names, t0, t1):
     """
-    Calculates astronomical events for a given target and date range.
+    Finds conjunctions and oppositions for several targets in a single sweep.
+
+    Each target's side of the Sun is sampled on one shared coarse grid, and
+    every interval where a side changes, for every target, is then bisected
+    together. Each pass evaluates only the interval midpoints, held in a single
+    Time array, so the Earth, Sun and nutation (the costliest part) are
+    computed once per pass for all targets.
     """
-    t0 = ts.from_datetime(pytz.utc.localize(start_date))
-    t1 = ts.from_datetime(pytz.utc.localize(end_date))
-    
-    events = {}
-    
-    # Only calculate moon phases if the target is the moon.
-    if target_name.lower() == 'moon':
-        f_moon = moon_phases(eph)
-        times, phases = find_discrete(t0, t1, f_moon)
-        events['moon_phases'] = list(zip(times.utc_iso(), phases))
-    else:
-        events['moon_phases'] = []
+    results = {}
+    functions = {}
+    for target_name in target_names:
+        try:
+            functions[target_name] = get_opposition_conjunction_function(eph, target_name)
+        except KeyError:
+            # Handle targets that are not present in the ephemeris.
+            results[target_name] = EventSet.empty(ts)
 
-    # Find conjunctions and oppositions for planets.
-    try:
-        target = eph[target_name]
-        f_opconj = oppositions_conjunctions(eph, target)
-        times, bodies = find_discrete(t0, t1, f_opconj)
-        events['oppositions_conjunctions'] = list(zip(times.utc_iso(), bodies))
-    except (KeyError, ValueError):
-        # Handle cases where a target like the 'sun' cannot have these events.
-        events['oppositions_conjunctions'] = []
+    if not functions or t1.tt <= t0.tt:
+        results.update((target_name, EventSet.empty(ts)) for target_name in functions)
+        return results
+
+    names = list(functions)
+    step_days = min(f.step_days for f in functions.values())
+    sample_count = int((t1.tt - t0.tt) / step_days) + 2
+    grid = numpy.linspace(t0.tt, t1.tt, sample_count)
+    earth = eph['earth'].at(ts.tt_jd(grid))
+    sun_lon = get_ecliptic_longitudes(earth, eph['sun'])
+
+    # One row per interval to refine: its bounds, owning target and the side
+    # the target ends up on.
+    starts, ends, owners, codes = [], [], [], []
+    for owner, target_name in enumerate(names):
+        sides = get_sun_sides(sun_lon, get_ecliptic_longitudes(earth, eph[target_name]))
+        indices = numpy.flatnonzero(numpy.diff(sides))
+        starts.append(grid[indices])
+        ends.append(grid[indices + 1])
+        owners.append(numpy.full(len(indices), owner))
+        codes.append(sides[indices + 1])
+    starts, ends = numpy.concatenate(starts), numpy.concatenate(ends)
+    owners, codes = numpy.concatenate(owners), numpy.concatenate(codes)
+
+    while len(starts) and (ends - starts).max() > REFINE_EPSILON:
+        middles = (starts + ends) / 2.0
+        earth = eph['earth'].at(ts.tt_jd(middles))
+        sun_lon = get_ecliptic_longitudes(earth, eph['sun'])
+        sides = numpy.empty(len(middles), dtype='int8')
+        for owner, target_name in enumerate(names):
+            selected = owners == owner
+            if selected.any():
+                target_lon = get_ecliptic_longitudes(earth, eph[target_name])
+                sides[selected] = get_sun_sides(sun_lon[selected], target_lon[selected])
+        # A middle already on the final side means the change happened before it.
+        changed = sides == codes
+        ends = numpy.where(changed, middles, ends)
+        starts = numpy.where(changed, starts, middles)
+
+    for owner, target_name in enumerate(names):
+        selected = owners == owner
+        results[target_name] = EventSet(ts.tt_jd(ends[selected]), codes[selected])
+
+    return results
+
+def find_moon_phases(eph, ts, t0, t1):
+    """Finds moon phases between two times, searching decade-long chunks at a time."""
+    f_moon = get_moon_phase_function(eph)
+    searches = []
+    chunk_start = t0
+    while chunk_start.tt < t1.tt:
+        chunk_end = ts.tt_jd(min(chunk_start.tt + SEARCH_CHUNK_DAYS, t1.tt))
+        searches.append(find_discrete(chunk_start, chunk_end, f_moon))
+        chunk_start = chunk_end
+    return EventSet.from_searches(ts, searches)
+
+def calculate_astronomical_events(eph, ts, target_names, start_date, end_date):
+    """
+    Calculates astronomical events for the given targets and date range.
+
+    Returns a dictionary mapping each target name to a dictionary of EventSets.
+    """
+    t0 = ts.from_datetime(start_date.replace(tzinfo=timezone.utc))
+    t1 = ts.from_datetime(end_date.replace(tzinfo=timezone.utc))
+
+    opconj = find_oppositions_conjunctions(eph, ts, target_names, t0, t1)
+
+    results = {}
+    for target_name in target_names:
+        events = {}
+
+        # Only calculate moon phases if the target is the moon.
+        if target_name == 'moon':
+            events['moon_phases'] = find_moon_phases(eph, ts, t0, t1)
+        else:
+            events['moon_phases'] = EventSet.empty(ts)
+
+        events['oppositions_conjunctions'] = opconj[target_name]
+        results[target_name] = events
+
+    return results
+
+def get_astronomical_events(eph, ts, target_names, start_date, end_date):
+    """
+    Returns astronomical events for the given targets and date range, reusing
+    results stored in the on-disk cache and calculating only the missing ones.
+
+    A single-day query (end_date not after start_date) covers that whole day.
+    """
+    if end_date <= start_date:
+        end_date = start_date + timedelta(days=1)
+
+    target_names = [target_name.lower() for target_name in target_names]
+    keys = {
+        target_name: get_events_cache_key(eph, target_name, start_date, end_date)
+        for target_name in target_names
+    }
+
+    # The cache is opened separately to read and to write, so it is not held
+    # open (and, for some dbm backends, locked) during the calculation.
+    results = read_cached_events(ts, keys)
+    missing = [name for name in target_names if name not in results]
+    if missing:
+        calculated = calculate_astronomical_events(eph, ts, missing, start_date, end_date)
+        write_cached_events(keys, calculated)
+        results.update(calculated)
 
-    return events
+    return results
 
 # --- OUTPUT & DISPLAY FUNCTIONS ---
 
+def make_moon_table():
+    """Build an empty moon phases table with its columns in place."""
+    moon_table = Table(title="🌕 Moon Phases", show_header=True, header_style="bold magenta")
+    moon_table.add_column("Date & Time", style="dim", width=30)
+    moon_table.add_column("Phase", justify="right")
+    moon_table.add_column("Symbol", justify="center")
+    return moon_table
+
+def make_align_table():
+    """Build an empty planetary alignments table with its columns in place."""
+    align_table = Table(title="🪐 Planetary Alignments", show_header=True, header_style="bold green")
+    align_table.add_column("Date & Time", style="dim", width=30)
+    align_table.add_column("Event", justify="right")
+    return align_table
+
 def print_events_rich(events, target_name, timezone_name, start_date, end_date):
     """Displays events using the rich library for beautiful terminal formatting."""
-    
+    tn = target_name.title()
+
     # --- Part 1: Human-Readable Summary Panel ---
-    summary_panel_content = [f"🔭 [bold cyan]Astronomical Summary for {target_name.title()}[/bold cyan]"]
-    summary_panel_content.append(f"🗓️ [dim]{start_date.strftime('%B %d, %Y')} to {end_date.strftime('%B %d, %Y')}[/dim]")
-    summary_panel_content.append(f"📍 All times shown in [bold yellow]{timezone_name}[/bold yellow]")
-    
-    console.print(Panel("\n".join(summary_panel_content), expand=False, border_style="green"))
+    summary_panel_content = f"""🔭 [bold cyan]Astronomical Summary for {tn}[/bold cyan]
+🗓️ [dim]{start_date.strftime('%B %d, %Y')} to {end_date.strftime('%B %d, %Y')}[/dim]
+📍 All times shown in [bold yellow]{timezone_name}[/bold yellow]"""
+
+    console.print(Panel(summary_panel_content, expand=False, border_style="green"))
+
+    tz = ZoneInfo(timezone_name)
 
     # --- Part 2: Moon Phases Table ---
     if 'moon_phases' in events and events['moon_phases']:
-        moon_table = Table(title="🌕 Moon Phases", show_header=True, header_style="bold magenta")
-        moon_table.add_column("Date & Time", style="dim", width=30)
-        moon_table.add_column("Phase", justify="right")
-        moon_table.add_column("Symbol", justify="center")
-
-        for utc_time, phase in events['moon_phases']:
-            local_time = convert_to_timezone(utc_time, timezone_name)
+        moon_table = make_moon_table()
+        moon_phases = events['moon_phases']
+        local_times = (convert_to_timezone(utc_dt, tz) for utc_dt in moon_phases.times.utc_datetime())
+        for local_time, phase in zip(local_times, moon_phases.codes.tolist()):
             phase_name, phase_symbol = get_moon_phase_details(phase)
             moon_table.add_row(local_time, phase_name, phase_symbol)
         console.print(moon_table)
 
     # --- Part 3: Planetary Alignments Table ---
     if 'oppositions_conjunctions' in events and events['oppositions_conjunctions']:
-        align_table = Table(title="🪐 Planetary Alignments", show_header=True, header_style="bold green")
-        align_table.add_column("Date & Time", style="dim", width=30)
-        align_table.add_column("Event", justify="right")
-
-        for utc_time, event_type in events['oppositions_conjunctions']:
-            local_time = convert_to_timezone(utc_time, timezone_name)
+        align_table = make_align_table()
+        alignments = events['oppositions_conjunctions']
+        local_times = (convert_to_timezone(utc_dt, tz) for utc_dt in alignments.times.utc_datetime())
+        for local_time, event_type in zip(local_times, alignments.codes.tolist()):
             event_name = get_opposition_conjunction_name(event_type, target_name)
             align_table.add_row(local_time, event_name)
         console.print(align_table)
@@ -127,27 +356,43 @@ def print_events_rich(events, target_name, timezone_name, start_date, end_date):
         ])
     else:
         notes.extend([
-            f"  • [bold]Conjunction[/bold]: {target_name.title()} aligns with the Sun from our perspective.",
-            f"  • [bold]Opposition[/bold]: Earth is between the Sun and {target_name.title()}.",
+            f"  • [bold]Conjunction[/bold]: {tn} aligns with the Sun from our perspective.",
+            f"  • [bold]Opposition[/bold]: Earth is between the Sun and {tn}.",
             "  • Oppositions are generally the best times for observation."
         ])
     console.print("\n".join(notes))
     
 # --- INPUT VALIDATION FUNCTIONS ---
 
+def is_valid_timezone(tz_name):
+    """Checks a timezone name by loading just that zone, rather than listing them all."""
+    try:
+        ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError, OSError):
+        # OSError covers names like 'America', which are directories in tzdata.
+        return False
+    return True
+
 def validate_celestial_body(body_name):
     """Validates celestial body names and suggests corrections for typos."""
-    if body_name.lower() in SUPPORTED_BODIES:
-        return body_name.lower()
-    
-    closest_match = min(SUPPORTED_BODIES, key=lambda x: levenshtein_distance(body_name.lower(), x))
+    name = body_name.casefold()
+    if name in SUPPORTED_BODIES:
+        return name
     
-    if levenshtein_distance(body_name.lower(), closest_match) <= 2:
+    # Distances above the cutoff are reported as cutoff + 1, so the search
+    # never fills more of the DP matrix than a suggestion needs.
+    closest_match, closest_distance = None, 3
+    for candidate in SUPPORTED_BODIES_ORDERED:
+        distance = levenshtein_distance(name, candidate, score_cutoff=2)
+        if distance < closest_distance:
+            closest_match, closest_distance = candidate, distance
+
+    if closest_match:
         if Confirm.ask(f"[yellow]Invalid body '{body_name}'. Did you mean '[bold green]{closest_match}[/bold green]'?", default=True):
             return closest_match
     
     console.print(f"[red]Error: '{body_name}' is not a supported celestial body.[/red]")
-    console.print(f"Supported bodies are: {', '.join(SUPPORTED_BODIES)}")
+    console.print(f"Supported bodies are: {', '.join(SUPPORTED_BODIES_ORDERED)}")
     return None
 
 def validate_date(date_str, prompt_text):
@@ -166,7 +411,7 @@ def validate_timezone(tz_name):
     while True:
         if not tz_name:
             tz_name = Prompt.ask("Enter timezone (e.g., 'America/Sao_Paulo', 'UTC')", default="UTC")
-        if tz_name in pytz.all_timezones:
+        if is_valid_timezone(tz_name):
             return tz_name
         else:
             console.print(f"[red]Invalid timezone '{tz_name}'. Please try again.[/red]")
@@ -174,13 +419,13 @@ def validate_timezone(tz_name):
 
 # --- INTERACTIVE MODE ---
 
-def interactive_mode(eph, ts):
+def interactive_mode():
     """Guides the user through an interactive session to get event data."""
     console.print(Panel("[bold green]Welcome to AstroData Interactive Mode! ✨[/bold green]"))
 
     target_name = None
     while not target_name:
-        raw_target = Prompt.ask("🔭 Which celestial body are you interested in?", choices=SUPPORTED_BODIES)
+        raw_target = Prompt.ask("🔭 Which celestial body are you interested in?", choices=list(SUPPORTED_BODIES_ORDERED))
         target_name = validate_celestial_body(raw_target)
 
     mode = Prompt.ask("🗓️ Do you want events for a [bold](s)[/bold]ingle day or a date [bold](r)[/bold]ange?", choices=["s", "r"], default="r")
@@ -197,15 +442,26 @@ def interactive_mode(eph, ts):
             if end_date <= start_date:
                 console.print("[red]End date must be after the start date.[/red]")
 
-    timezone = validate_timezone(None)
+    timezone_name = validate_timezone(None)
+
+    eph, ts = load_ephemeris()
 
     with console.status("[bold green]Calculating astronomical events...[/bold green]"):
-        events = get_astronomical_events(eph, ts, target_name, start_date, end_date)
+        events = get_astronomical_events(eph, ts, [target_name], start_date, end_date)[target_name]
     
-    print_events_rich(events, target_name, timezone, start_date, end_date)
+    print_events_rich(events, target_name, timezone_name, start_date, end_date)
 
 # --- MAIN EXECUTION ---
 
+def load_ephemeris():
+    """Loads the cached ephemeris and timescale, exiting with a message on failure."""
+    try:
+        return get_eph_ts()
+    except Exception as e:
+        console.print(f"[bold red]Error loading ephemeris data: {e}[/bold red]")
+        console.print("Please ensure you have an internet connection for the first run.")
+        sys.exit(1)
+
 def main():
     parser = argparse.ArgumentParser(
         description='Find astronomical events. Run without arguments for interactive mode.',
@@ -220,16 +476,8 @@ def main():
     
     args = parser.parse_args()
 
-    try:
-        eph = load('de421.bsp')
-        ts = load.timescale()
-    except Exception as e:
-        console.print(f"[bold red]Error loading ephemeris data: {e}[/bold red]")
-        console.print("Please ensure you have an internet connection for the first run.")
-        sys.exit(1)
-
     if args.interactive or not (args.target and args.start):
-        interactive_mode(eph, ts)
+        interactive_mode()
     else:
         target_name = validate_celestial_body(args.target)
         if not target_name:
@@ -246,12 +494,14 @@ def main():
             console.print("[red]Error: End date must not be before start date.[/red]")
             sys.exit(1)
         
-        if args.timezone not in pytz.all_timezones:
+        if not is_valid_timezone(args.timezone):
             console.print(f"[red]Error: Invalid timezone '{args.timezone}'.[/red]")
             sys.exit(1)
-        
+
+        eph, ts = load_ephemeris()
+
         with console.status("[bold green]Calculating astronomical events...[/bold green]"):
-            events = get_astronomical_events(eph, ts, target_name, start_date, end_date)
+            events = get_astronomical_events(eph, ts, [target_name], start_date, end_date)[target_name]
         
         print_events_rich(events, target_name, args.timezone, start_date, end_date)
 